@@ -0,0 +1,132 @@
+import json
+import argparse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import schedule_service
+from schedule_service import DATA_FILE
+
+
+# Local JSON API for integrations (pharmacy systems etc.) that need to push many
+# schedule changes at once instead of driving the Streamlit UI.
+#
+#   GET  /patients                      -> full schedule
+#   POST /patients/batch                {"patients": [{"name", "phone", "medications": [...]}, ...]}
+#   POST /medications/batch             {"medications": [{"patient", "phone"?, "name", "frequency",
+#                                                         "times"?, "day"?, "datetime"?}, ...]}
+#   GET  /reminders/due?start=&end=     reminders in the window ("YYYY-MM-DD HH:MM", default next hour,
+#                                       at most MAX_DUE_WINDOW long)
+
+MAX_BODY_BYTES = 50 * 1024 * 1024
+# Longest window /reminders/due will expand; cost grows with days x medications
+MAX_DUE_WINDOW = timedelta(days=7)
+
+
+class ScheduleAPIHandler(BaseHTTPRequestHandler):
+    data_file = DATA_FILE
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return None
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path == "/patients":
+            try:
+                schedule = schedule_service.load_schedule(self.data_file)
+            except Exception as e:
+                self._send_json(500, {"error": f"Could not read schedule: {e}"})
+                return
+            self._send_json(200, schedule.to_dict())
+
+        elif url.path == "/reminders/due":
+            query = parse_qs(url.query)
+            try:
+                now = datetime.now()
+                start = datetime.strptime(query["start"][0], "%Y-%m-%d %H:%M") if "start" in query else now
+                end = datetime.strptime(query["end"][0], "%Y-%m-%d %H:%M") if "end" in query else start + timedelta(hours=1)
+            except ValueError:
+                self._send_json(400, {"error": "start/end must be in 'YYYY-MM-DD HH:MM' format"})
+                return
+            if end < start:
+                self._send_json(400, {"error": "end must not be before start"})
+                return
+            if end - start > MAX_DUE_WINDOW:
+                self._send_json(400, {"error": f"Window must not exceed {MAX_DUE_WINDOW.days} days"})
+                return
+
+            try:
+                schedule = schedule_service.load_schedule(self.data_file)
+            except Exception as e:
+                self._send_json(500, {"error": f"Could not read schedule: {e}"})
+                return
+            self._send_json(200, {"reminders": schedule_service.due_reminders(schedule, start, end)})
+
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+
+        if url.path == "/patients/batch":
+            field, operation = "patients", schedule_service.upsert_patients
+        elif url.path == "/medications/batch":
+            field, operation = "medications", schedule_service.upsert_medications
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+            return
+
+        payload = self._read_json()
+        if not isinstance(payload, dict) or not isinstance(payload.get(field), list):
+            self._send_json(400, {"error": f"Body must be a JSON object with a '{field}' list"})
+            return
+        if not all(isinstance(item, dict) for item in payload[field]):
+            self._send_json(400, {"error": f"Every entry in '{field}' must be an object"})
+            return
+
+        try:
+            results = schedule_service.apply_batch(self.data_file, operation, payload[field])
+        except Exception as e:
+            self._send_json(500, {"error": f"Batch not applied: {e}"})
+            return
+        self._send_json(200, {"results": results})
+
+
+def run_server(host="127.0.0.1", port=8502, data_file=DATA_FILE):
+    ScheduleAPIHandler.data_file = data_file
+    server = ThreadingHTTPServer((host, port), ScheduleAPIHandler)
+    print(f"[INFO] Schedule API listening on http://{host}:{port} (store: {data_file})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("[INFO] Schedule API stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local JSON API for medication schedules")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--data-file", default=DATA_FILE)
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.data_file)
@@ -0,0 +1 @@
+# Lets the tests import the top-level modules (models, due_index, simulate, ...)
@@ -0,0 +1,122 @@
+from collections import defaultdict
+
+from models import MINUTES_PER_DAY, Frequency, Patient, to_absolute_minute
+
+
+def _parse_patient(key, raw):
+    """Patient from a raw record; legacy list-shaped records (bare medication lists) included"""
+    if isinstance(raw, list):
+        raw = {"display_name": key, "phone": "", "medications": raw}
+    return Patient.from_dict(key, raw)
+
+def _fingerprint(raw):
+    """Cheap change detector for a raw patient record (json.load keeps key order stable)"""
+    return hash(repr(raw))
+
+
+class DueIndex:
+    """
+    In-memory due-time structure for the long-running dispatcher.
+
+    Daily doses are bucketed by minute of the day, Weekly doses by minute of the
+    week (Monday 00:00 = 0) and Once alarms by absolute minute, so finding what
+    is due now is a dict lookup instead of a scan over every medication.
+
+    Updates are applied per patient: apply() compares a fingerprint of each raw
+    patient record with the one seen last time and only re-buckets patients
+    that were added, changed or removed.
+    """
+
+    __slots__ = ("_daily", "_weekly", "_once", "_patients", "_fingerprints", "_slots")
+
+    def __init__(self):
+        self._daily = defaultdict(dict)      # minute of day -> {patient_key: [Medication]}
+        self._weekly = defaultdict(dict)     # minute of week -> {patient_key: [Medication]}
+        self._once = defaultdict(dict)       # absolute minute -> {patient_key: [Medication]}
+        self._patients = {}                  # patient_key -> Patient
+        self._fingerprints = {}              # patient_key -> hash of the raw record last seen, for diffing
+        self._slots = {}                     # patient_key -> [(bucket, slot)] occupied by the patient
+
+    def __len__(self):
+        return len(self._patients)
+
+    def apply(self, schedule_data):
+        """
+        Bring the index in line with a freshly loaded med_schedule.json dict.
+        Returns (added, changed, removed) patient counts. A malformed patient
+        record is logged and skipped; its previous entries stay indexed.
+        """
+        patients = schedule_data.get("patients", {}) if isinstance(schedule_data, dict) else None
+        if not isinstance(patients, dict):
+            print("⚠️ med_schedule.json has no 'patients' object, keeping the current index.")
+            return 0, 0, 0
+        added = changed = removed = 0
+
+        for key in [k for k in self._fingerprints if k not in patients]:
+            self.remove_patient(key)
+            removed += 1
+
+        for key, raw in patients.items():
+            fingerprint = _fingerprint(raw)
+            previous = self._fingerprints.get(key)
+            if previous == fingerprint:
+                continue
+            try:
+                patient = _parse_patient(key, raw)
+            except (AttributeError, TypeError, ValueError) as e:
+                print(f"⚠️ Skipping malformed patient record '{key}': {e}")
+                continue
+            if previous is None:
+                added += 1
+            else:
+                changed += 1
+            self.set_patient(patient, fingerprint)
+
+        return added, changed, removed
+
+    def set_patient(self, patient, fingerprint=None):
+        """Insert or replace every bucket entry of one patient"""
+        self.remove_patient(patient.key)
+        self._patients[patient.key] = patient
+        self._fingerprints[patient.key] = fingerprint if fingerprint is not None else _fingerprint(patient.to_dict())
+
+        slots = []
+        for med in patient.medications:
+            if med.frequency is Frequency.ONCE:
+                if med.once_at is not None:
+                    slots.append((self._once, med.once_at, med))
+            elif med.frequency is Frequency.DAILY:
+                slots.extend((self._daily, m, med) for m in set(med.times))
+            elif med.frequency is Frequency.WEEKLY and med.weekday is not None:
+                slots.extend((self._weekly, med.weekday * MINUTES_PER_DAY + m, med) for m in set(med.times))
+
+        occupied = []
+        for bucket, slot, med in slots:
+            entries = bucket[slot].setdefault(patient.key, [])
+            if not entries:
+                occupied.append((bucket, slot))
+            entries.append(med)
+        self._slots[patient.key] = occupied
+
+    def remove_patient(self, key):
+        for bucket, slot in self._slots.pop(key, ()):
+            entries = bucket[slot]
+            entries.pop(key, None)
+            if not entries:
+                del bucket[slot]
+        self._patients.pop(key, None)
+        self._fingerprints.pop(key, None)
+
+    def due_at(self, when):
+        """
+        Medications due at the minute of `when`, grouped by patient:
+        [(Patient, [Medication, ...]), ...]
+        """
+        day_minute = when.hour * 60 + when.minute
+        week_minute = when.weekday() * MINUTES_PER_DAY + day_minute
+        grouped = defaultdict(list)
+        lookups = ((self._daily, day_minute), (self._weekly, week_minute), (self._once, to_absolute_minute(when)))
+        for bucket, slot in lookups:
+            for key, meds in bucket.get(slot, {}).items():
+                grouped[key].extend(meds)
+        return [(self._patients[key], meds) for key, meds in grouped.items()]
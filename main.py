@@ -1,121 +1,29 @@
 import streamlit as st
-import os
-import json
 from datetime import datetime
-import calendar
 
+from schedule_service import (
+    DATA_FILE,
+    FREQUENCIES,
+    remove_empty_patients,
+    check_medicine_exists,
+    format_once_datetime,
+    build_medication,
+    load_schedule,
+    save_schedule,
+    upsert_patient,
+    add_medication,
+)
+from models import minutes_to_time, DAY_NAMES
 
-DATA_FILE = "med_schedule.json"
-def normalize_name(name):
-    """Normalize names by stripping whitespace and converting to lowercase"""
-    return name.strip().lower()
-
-def normalize_medicine_name(med_name):
-    """Normalize medicine names by stripping whitespace and converting to lowercase"""
-    return med_name.strip().lower()
-
-def remove_empty_patients(schedule_data):
-    if "patients" in schedule_data:
-        empty_patients = [p for p, data in schedule_data["patients"].items() if not data.get("medications")]
-        for p in empty_patients:
-            del schedule_data["patients"][p]
-
-def validate_phone_number(phone_number):
-    """Validate phone number format"""
-    if not phone_number:
-        return False, "Phone number is required for new patients!"
-    
-    # Normalize input: add '+' if missing but starts with 91
-    if phone_number.startswith("91") and not phone_number.startswith("+91"):
-        phone_number = "+" + phone_number
-    
-    if not phone_number.startswith("+91"):
-        return False, "Phone number must start with +91!"
-    
-    # Remove +91
-    remaining_digits = phone_number[3:]
-    # Remove spaces and dashes
-    remaining_digits = remaining_digits.replace(" ", "").replace("-", "")
-    
-    if not remaining_digits.isdigit():
-        return False, "Phone number must contain only digits after +91!"
-    
-    if len(remaining_digits) != 10:
-        return False, "Phone number must be 10 digits after +91!"
-    
-    return True, ""
 
 # Load existing data or initialize
-if os.path.exists(DATA_FILE):
-    with open(DATA_FILE, "r") as f:
-        schedule_data = json.load(f)
-        
-    # Convert old data structure to new structure if needed
-    if "patients" in schedule_data:
-        normalized_patients = {}
-        for patient_name, patient_data in schedule_data["patients"].items():
-            normalized_key = normalize_name(patient_name)
-
-            # If old structure (list), convert to dict
-            if isinstance(patient_data, list):
-                normalized_patients[normalized_key] = {
-                    "phone": "",
-                    "display_name": patient_name,
-                    "medications": []
-                }
-                for med in patient_data:
-                    med["normalized_name"] = normalize_medicine_name(med["name"])
-                    normalized_patients[normalized_key]["medications"].append(med)
-            else:
-                # Ensure display_name is stored
-                if "display_name" not in patient_data:
-                    patient_data["display_name"] = patient_name
-
-                # *** THIS PART TO NORMALIZE OLD MEDICINES ***
-                for med in patient_data.get("medications", []):
-                    if "normalized_name" not in med:
-                        med["normalized_name"] = normalize_medicine_name(med["name"])
-
-                normalized_patients[normalized_key] = patient_data
-
-        # Replace with normalized keys
-        schedule_data["patients"] = normalized_patients
-
-    else:
-        schedule_data = {"patients": {}}
-else:
-    schedule_data = {"patients": {}}
-
-    
+schedule = load_schedule(DATA_FILE)
 
 st.set_page_config(page_title="EasyMed", page_icon="💊", layout="centered")
 st.title("🩺 EasyMed: Elderly Medicine Reminder")
 st.markdown("Enter the medicine prescription to get reminders on time!")
 
 
-def check_medicine_exists(patient_medications, med_name, frequency, times=None, day=None, datetime_str=None):
-    """Check if a medicine with same name and schedule already exists for a patient"""
-    normalized_med_name = normalize_medicine_name(med_name)
-    
-    for med in patient_medications:
-        if med.get("normalized_name") == normalized_med_name:
-            # Check if it's the same frequency
-            if med["frequency"] == frequency:
-                # For Daily/Weekly, check times
-                if frequency in ["Daily", "Weekly"]:
-                    if med.get("times") == times:
-                        # For Weekly, also check day
-                        if frequency == "Weekly":
-                            if med.get("day") == day:
-                                return True
-                        else:
-                            return True
-                # For Once, check datetime
-                elif frequency == "Once":
-                    if med.get("datetime") == datetime_str:
-                        return True
-    return False
-
 if "num_doses" not in st.session_state:
     st.session_state.num_doses = 1
 
@@ -124,8 +32,8 @@ if "selected_frequency" not in st.session_state:
     
 st.selectbox(
     "Frequency",
-    ["Daily", "Once", "Weekly"],
-    index=["Daily", "Once", "Weekly"].index(st.session_state.selected_frequency),
+    FREQUENCIES,
+    index=FREQUENCIES.index(st.session_state.selected_frequency),
     key="selected_frequency"
 )
 
@@ -156,7 +64,7 @@ with st.form("medForm"):
         times = []
 
     if frequency == "Weekly":
-        day = st.selectbox("Select day of week", list(calendar.day_name), key="main_day")
+        day = st.selectbox("Select day of week", DAY_NAMES, key="main_day")
 
     if frequency == "Once":
         once_date = st.date_input("Select date", key="main_once_date")
@@ -165,70 +73,23 @@ with st.form("medForm"):
     submit = st.form_submit_button("Add Reminder🔔")
 
 if submit and med_name and patient_name:
-    normalized_patient_name = normalize_name(patient_name)
-
-    if "patients" not in schedule_data:
-        schedule_data["patients"] = {}
-
-    # Check if this is a new patient
-    is_new_patient = normalized_patient_name not in schedule_data["patients"]
-    
-    # Validate phone number
-    phone_valid = True
-    error_message = ""
-    
-    if is_new_patient:
-        # For new patients, phone number is mandatory
-        phone_valid, error_message = validate_phone_number(phone_number)
-    else:
-        # For existing patients, validate only if phone number is provided
-        if phone_number:
-            phone_valid, error_message = validate_phone_number(phone_number)
+    # Create the patient, or update the phone number of an existing one
+    phone_valid, error_message, normalized_patient_name = upsert_patient(schedule, patient_name, phone_number)
 
     if not phone_valid:
         st.error(f"❌ {error_message}")
     else:
-        # Create new patient if needed
-        if is_new_patient:
-            schedule_data["patients"][normalized_patient_name] = {
-                "display_name": patient_name,
-                "phone": phone_number,
-                "medications": []
-            }
-        else:
-            # Update phone number for existing patient if provided
-            if phone_number:
-                schedule_data["patients"][normalized_patient_name]["phone"] = phone_number
-
         # Prepare datetime string for Once frequency
         datetime_str = None
         if frequency == "Once":
-            datetime_str = f"{once_date.strftime('%Y-%m-%d')} {once_time.strftime('%H:%M')}"
+            datetime_str = format_once_datetime(once_date, once_time)
 
-        # Check for duplication using normalized names
-        if check_medicine_exists(schedule_data["patients"][normalized_patient_name]["medications"],
-                                 med_name, frequency, times, day, datetime_str):
+        # Add the medicine unless the same schedule already exists (normalized names)
+        if not add_medication(schedule, normalized_patient_name, med_name, frequency, times, day, datetime_str):
             st.warning("⚠️ This medicine schedule already exists for this patient.")
         else:
-            # Add the medicine
-            new_entry = {
-                "name": med_name,
-                "normalized_name": normalize_medicine_name(med_name),
-                "frequency": frequency,
-            }
-
-            if frequency == "Daily":
-                new_entry["times"] = times
-            elif frequency == "Weekly":
-                new_entry["times"] = times
-                new_entry["day"] = day
-            elif frequency == "Once":
-                new_entry["datetime"] = datetime_str
-
-            schedule_data["patients"][normalized_patient_name]["medications"].append(new_entry)
-            remove_empty_patients(schedule_data)
-            with open(DATA_FILE, "w") as f:
-                json.dump(schedule_data, f, indent=4)
+            remove_empty_patients(schedule)
+            save_schedule(schedule, DATA_FILE)
 
             # Success message
             if frequency == "Weekly":
@@ -240,13 +101,13 @@ if submit and med_name and patient_name:
 
 # --- Manage Medication Schedules ---
 st.subheader("📋 Manage Medication Schedules")
-if "patients" in schedule_data and schedule_data["patients"]:
+if schedule.patients:
     # Create display names for dropdown (use display_name if available, otherwise use key)
     patient_display_names = []
     patient_key_mapping = {}
     
-    for key, patient_data in schedule_data["patients"].items():
-        display_name = f"{patient_data.get('display_name', key.title())} ({key})"  # Add normalized key to guarantee uniqueness
+    for key, patient in schedule.patients.items():
+        display_name = f"{patient.display_name} ({key})"  # Add normalized key to guarantee uniqueness
         patient_display_names.append(display_name)
         patient_key_mapping[display_name] = key
     
@@ -255,22 +116,17 @@ if "patients" in schedule_data and schedule_data["patients"]:
 
 
     if selected_patient:
-        patient_data = schedule_data["patients"][selected_patient]
-        meds = patient_data["medications"]
+        patient = schedule.patients[selected_patient]
+        meds = patient.medications
         
         # Display patient info
-        st.info(f"📱 Phone: {patient_data.get('phone', 'Not provided')}")
+        st.info(f"📱 Phone: {patient.phone or 'Not provided'}")
         
         if meds:
             for i, med in enumerate(meds):
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    if med["frequency"] == "Weekly":
-                        st.write(f"{i+1}. **{med['name']}** at {', '.join(med['times'])} every {med.get('day', 'N/A')}")
-                    elif med["frequency"] == "Once":
-                        st.write(f"{i+1}. **{med['name']}** at {med.get('datetime', 'N/A')}")
-                    else:
-                        st.write(f"{i+1}. **{med['name']}** at {', '.join(med['times'])}")
+                    st.write(f"{i+1}. {med.describe()}")
 
                 # Create a second row of columns for buttons (Edit + Delete side by side)
                 btn_col1, btn_col2 = st.columns([1, 1])
@@ -281,14 +137,13 @@ if "patients" in schedule_data and schedule_data["patients"]:
 
                 with btn_col2:
                     if st.button("❌ Delete", key=f"del_{selected_patient}_{i}"):
-                        schedule_data["patients"][selected_patient]["medications"].pop(i)
+                        meds.pop(i)
                         # Remove patient if no medications left
-                        if not schedule_data["patients"][selected_patient]["medications"]:
-                            del schedule_data["patients"][selected_patient]
-                        remove_empty_patients(schedule_data)
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(schedule_data, f, indent=4)
-                        st.success(f"Deleted {med['name']} for {selected_display_name}")
+                        if not meds:
+                            del schedule.patients[selected_patient]
+                        remove_empty_patients(schedule)
+                        save_schedule(schedule, DATA_FILE)
+                        st.success(f"Deleted {med.name} for {selected_display_name}")
                         st.rerun()
             
             # "➕ Add Medicine" Button & Form per Patient
@@ -325,8 +180,8 @@ if "patients" in schedule_data and schedule_data["patients"]:
 
                 st.selectbox(
                     "Frequency",
-                    ["Daily", "Once", "Weekly"],
-                    index=["Daily", "Once", "Weekly"].index(st.session_state[freq_key]),
+                    FREQUENCIES,
+                    index=FREQUENCIES.index(st.session_state[freq_key]),
                     key=freq_key
                 )
                 
@@ -348,7 +203,7 @@ if "patients" in schedule_data and schedule_data["patients"]:
                     # Day selection for Weekly:
                     new_day = None
                     if new_freq == "Weekly":
-                        new_day = st.selectbox("Select day of week", list(calendar.day_name), key=f"day_select_{selected_patient}")
+                        new_day = st.selectbox("Select day of week", DAY_NAMES, key=f"day_select_{selected_patient}")
 
                     # Once fields:
                     once_date = None
@@ -368,31 +223,15 @@ if "patients" in schedule_data and schedule_data["patients"]:
                     # Prepare datetime string for Once frequency
                     datetime_str = None
                     if new_freq == "Once":
-                        datetime_str = f"{once_date.strftime('%Y-%m-%d')} {once_time.strftime('%H:%M')}"
+                        datetime_str = format_once_datetime(once_date, once_time)
 
                     # Check for duplication using normalized names
-                    if check_medicine_exists(schedule_data["patients"][selected_patient]["medications"], 
-                                           new_med_name, new_freq, new_times, new_day, datetime_str):
+                    if not add_medication(schedule, selected_patient, new_med_name, new_freq,
+                                          new_times, new_day, datetime_str):
                         st.warning("⚠️ This medicine schedule already exists for this patient.")
                     else:
-                        new_entry = {
-                            "name": new_med_name,
-                            "normalized_name": normalize_medicine_name(new_med_name),# Keep original case for display
-                            "frequency": new_freq
-                        }
-
-                        if new_freq == "Daily":
-                            new_entry["times"] = new_times
-                        elif new_freq == "Weekly":
-                            new_entry["times"] = new_times
-                            new_entry["day"] = new_day
-                        elif new_freq == "Once":
-                            new_entry["datetime"] = datetime_str
-                                
-                        schedule_data["patients"][selected_patient]["medications"].append(new_entry)
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(schedule_data, f, indent=4)
-                        
+                        save_schedule(schedule, DATA_FILE)
+
                         if new_freq == "Weekly":
                             st.success(f"✅ Added {new_med_name} for {selected_display_name} at {', '.join(new_times)} every {new_day}")
                         elif new_freq == "Once":
@@ -416,20 +255,20 @@ if "patients" in schedule_data and schedule_data["patients"]:
             if "edit_index" in st.session_state and "edit_patient" in st.session_state:
                 edit_index = st.session_state.edit_index
                 edit_patient = st.session_state.edit_patient
-                med_to_edit = schedule_data["patients"][edit_patient]["medications"][edit_index]
+                med_to_edit = schedule.patients[edit_patient].medications[edit_index]
 
                 st.subheader("✏️ Edit Medication")
                 edit_freq_key = f"edit_freq_{edit_patient}"
                 if edit_freq_key not in st.session_state:
-                        st.session_state[edit_freq_key] = med_to_edit["frequency"]
+                        st.session_state[edit_freq_key] = med_to_edit.frequency.value
                 # Number of doses input OUTSIDE the form
                 if "edit_num_doses" not in st.session_state:
-                    st.session_state.edit_num_doses = len(med_to_edit.get("times", [1]))
+                    st.session_state.edit_num_doses = len(med_to_edit.times) or 1
                     
                 st.selectbox(
                         "Edit Frequency",
-                        ["Daily", "Once", "Weekly"],
-                        index=["Daily", "Once", "Weekly"].index(st.session_state[edit_freq_key]),
+                        FREQUENCIES,
+                        index=FREQUENCIES.index(st.session_state[edit_freq_key]),
                         key=edit_freq_key
                     )
                 if st.session_state[edit_freq_key] in ["Daily", "Weekly"]:
@@ -446,14 +285,14 @@ if "patients" in schedule_data and schedule_data["patients"]:
                         st.session_state.edit_num_doses = new_num_doses
 
                 with st.form("edit_form"):
-                    new_name = st.text_input("Edit Medicine Name", med_to_edit["name"])
+                    new_name = st.text_input("Edit Medicine Name", med_to_edit.name)
                     new_freq = st.session_state[edit_freq_key]
                     if new_freq in ["Daily", "Weekly"]:
                         new_times = []
                         
                         for j in range(st.session_state.edit_num_doses):
-                            if j < len(med_to_edit.get("times", [])):
-                                default_time = datetime.strptime(med_to_edit["times"][j], "%H:%M").time()
+                            if j < len(med_to_edit.times):
+                                default_time = minutes_to_time(med_to_edit.times[j])
                             else:
                                 default_time = datetime.now().time()
                             new_time = st.time_input(f"Edit Time {j+1}", default_time, key=f"edit_time_{j}")
@@ -463,15 +302,15 @@ if "patients" in schedule_data and schedule_data["patients"]:
                     new_day = None
                     if new_freq == "Weekly":
                         default_day_index = 0
-                        if "day" in med_to_edit and med_to_edit["day"] in calendar.day_name:
-                            default_day_index = list(calendar.day_name).index(med_to_edit["day"])
-                        new_day = st.selectbox("Edit Day of Week", list(calendar.day_name), index=default_day_index)
+                        if med_to_edit.weekday is not None:
+                            default_day_index = med_to_edit.weekday
+                        new_day = st.selectbox("Edit Day of Week", DAY_NAMES, index=default_day_index)
                     
                     # Date/time selection for Once frequency
                     once_date = None
                     once_time = None
                     if new_freq == "Once":
-                        default_datetime = datetime.strptime(med_to_edit.get("datetime", "2025-01-01 12:00"), "%Y-%m-%d %H:%M")
+                        default_datetime = datetime.strptime(med_to_edit.datetime_str or "2025-01-01 12:00", "%Y-%m-%d %H:%M")
                         once_date = st.date_input("Edit Date", default_datetime.date())
                         once_time = st.time_input("Edit Time", default_datetime.time())
 
@@ -486,49 +325,21 @@ if "patients" in schedule_data and schedule_data["patients"]:
                     # Prepare datetime string for Once frequency
                     datetime_str = None
                     if new_freq == "Once":
-                        datetime_str = f"{once_date.strftime('%Y-%m-%d')} {once_time.strftime('%H:%M')}"
+                        datetime_str = format_once_datetime(once_date, once_time)
+                        new_times = []  # <- ADD THIS LINE to avoid NameError
 
                     # Check for duplication (excluding current medicine being edited)
-                    temp_medications = schedule_data["patients"][edit_patient]["medications"].copy()
+                    temp_medications = schedule.patients[edit_patient].medications.copy()
                     temp_medications.pop(edit_index)  # Remove current medicine for duplication check
-                    # Prepare datetime string for Once frequency
-                    datetime_str = None
-                    if new_freq == "Once":
-                        datetime_str = f"{once_date.strftime('%Y-%m-%d')} {once_time.strftime('%H:%M')}"
-                        new_times = []  # <- ADD THIS LINE to avoid NameError
 
                     if check_medicine_exists(temp_medications, new_name, new_freq, new_times, new_day, datetime_str):
                         st.warning("⚠️ This medicine schedule already exists for this patient.")
                     else:
-                        if new_freq == "Daily":
-                            updated_med = {
-                                "name": new_name,
-                                "normalized_name": normalize_medicine_name(new_name),
-                                "frequency": new_freq,
-                                "times": new_times
-                            }
-                        elif new_freq == "Weekly":
-                            updated_med = {
-                                "name": new_name,
-                                "normalized_name": normalize_medicine_name(new_name),
-                                "frequency": new_freq,
-                                "times": new_times,
-                                "day": new_day
-                            }
-                        elif new_freq == "Once":
-                            updated_med = {
-                                "name": new_name,
-                                "normalized_name": normalize_medicine_name(new_name),
-                                "frequency": new_freq,
-                                "datetime": datetime_str
-                            }
+                        updated_med = build_medication(new_name, new_freq, new_times, new_day, datetime_str)
+                        schedule.patients[edit_patient].medications[edit_index] = updated_med
+                        save_schedule(schedule, DATA_FILE)
 
-                        schedule_data["patients"][edit_patient]["medications"][edit_index] = updated_med
-
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(schedule_data, f, indent=4)
-                        
-                        display_name = schedule_data["patients"][edit_patient].get("display_name", edit_patient.title())
+                        display_name = schedule.patients[edit_patient].display_name
                         if new_freq == "Weekly":
                             st.success(f"✅ Updated {new_name} for {display_name} - every {new_day} at {', '.join(new_times)}")
                         elif new_freq == "Once":
@@ -558,21 +369,16 @@ else:
 
 # --- Display All Scheduled Medications ---
 st.subheader("📋 All Medication Schedules")
-if "patients" in schedule_data and schedule_data["patients"]:
-    for patient_key, patient_data in schedule_data["patients"].items():
-        display_name = patient_data.get("display_name", patient_key.title())
+if schedule.patients:
+    for patient_key, patient in schedule.patients.items():
+        display_name = patient.display_name
         st.markdown(f"### 👤 {display_name}")
-        st.caption(f"📱 {patient_data.get('phone', 'No phone number')}")
+        st.caption(f"📱 {patient.phone or 'No phone number'}")
         
-        medications = patient_data["medications"]
+        medications = patient.medications
         if medications:
             for i, med in enumerate(medications):
-                if med["frequency"] == "Weekly":
-                    st.write(f"{i+1}. **{med['name']}** at {', '.join(med['times'])} every {med.get('day', 'N/A')}")
-                elif med["frequency"] == "Once":
-                    st.write(f"{i+1}. **{med['name']}** at {med.get('datetime', 'N/A')}")
-                else:
-                    st.write(f"{i+1}. **{med['name']}** at {', '.join(med['times'])}")
+                st.write(f"{i+1}. {med.describe()}")
         else:
             st.info(f"No medications for {display_name}.")
 else:
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import calendar
+import tempfile
+from enum import Enum
+from datetime import date, time
+
+
+# Compact in-memory model shared by the Streamlit UI (main.py), the service layer
+# and the dispatcher (remainder.py). The on-disk med_schedule.json format is unchanged;
+# records are parsed once on load instead of re-parsing "HH:MM" strings in every loop:
+#   - dose times are integer minutes since midnight
+#   - Once datetimes are integer minutes since 0001-01-01 (date ordinal * 1440 + minute)
+#   - weekdays are 0-6 (Monday = 0, as in calendar.day_name)
+#   - frequencies are a Frequency enum, normalized names are interned
+# Anything the model does not understand (unknown keys, values that fail to parse,
+# keys that were absent) is kept in `extra` and written back unchanged by to_dict().
+
+MINUTES_PER_DAY = 24 * 60
+DAY_NAMES = list(calendar.day_name)
+_WEEKDAY_BY_NAME = {name.lower(): i for i, name in enumerate(DAY_NAMES)}
+
+
+class Frequency(Enum):
+    DAILY = "Daily"
+    ONCE = "Once"
+    WEEKLY = "Weekly"
+
+    @classmethod
+    def parse(cls, value):
+        """Case-insensitive lookup ("daily", "Daily", Frequency.DAILY); None if unknown"""
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, str):
+            return None
+        return _FREQUENCY_BY_NAME.get(value.strip().lower())
+
+
+_FREQUENCY_BY_NAME = {f.value.lower(): f for f in Frequency}
+
+
+def parse_minutes(time_str):
+    """'HH:MM' -> minutes since midnight. Raises ValueError on anything else."""
+    if (not isinstance(time_str, str) or len(time_str) != 5 or time_str[2] != ":"
+            or not (time_str[:2] + time_str[3:]).isdecimal() or not time_str.isascii()):
+        raise ValueError(f"Invalid time '{time_str}', expected HH:MM")
+    hours, minutes = int(time_str[:2]), int(time_str[3:])
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time '{time_str}', expected HH:MM")
+    return hours * 60 + minutes
+
+def format_minutes(minutes):
+    """Minutes since midnight -> 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def minutes_to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+def parse_once(datetime_str):
+    """'YYYY-MM-DD HH:MM' -> absolute minute (date ordinal * 1440 + minute). Raises ValueError."""
+    if (not isinstance(datetime_str, str) or len(datetime_str) != 16 or datetime_str[10] != " "
+            or datetime_str[4] != "-" or datetime_str[7] != "-"
+            or not (datetime_str[:4] + datetime_str[5:7] + datetime_str[8:10]).isdecimal()
+            or not datetime_str.isascii()):
+        raise ValueError(f"Invalid datetime '{datetime_str}', expected YYYY-MM-DD HH:MM")
+    day = date(int(datetime_str[:4]), int(datetime_str[5:7]), int(datetime_str[8:10]))
+    return day.toordinal() * MINUTES_PER_DAY + parse_minutes(datetime_str[11:])
+
+def format_once(absolute_minute):
+    """Absolute minute -> 'YYYY-MM-DD HH:MM'"""
+    day = date.fromordinal(absolute_minute // MINUTES_PER_DAY)
+    return f"{day.isoformat()} {format_minutes(absolute_minute % MINUTES_PER_DAY)}"
+
+# Marks a key in `extra` that was absent in the stored record and must not be written back
+_MISSING = object()
+
+_MEDICATION_KEYS = {"name", "normalized_name", "frequency", "times", "day", "datetime"}
+_PATIENT_KEYS = {"display_name", "phone", "medications"}
+
+def _apply_extra(entry, extra):
+    if extra:
+        for key, value in extra.items():
+            if value is _MISSING:
+                entry.pop(key, None)
+            else:
+                entry[key] = value
+    return entry
+
+def to_absolute_minute(dt):
+    """datetime -> absolute minute, comparable with Medication.once_at"""
+    return dt.toordinal() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+class Medication:
+    __slots__ = ("name", "normalized_name", "frequency", "times", "weekday", "once_at", "extra")
+
+    def __init__(self, name, frequency, times=(), weekday=None, once_at=None, normalized_name=None, extra=None):
+        self.name = name
+        self.normalized_name = sys.intern(normalized_name if normalized_name is not None else name.strip().lower())
+        # Frequency member, or the raw string when the stored value is not recognised
+        self.frequency = frequency
+        self.times = tuple(times)
+        self.weekday = weekday
+        self.once_at = once_at
+        # Raw stored values to write back as-is (None when the record parsed cleanly)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, med):
+        """
+        Build from a stored medication dict. Values that do not parse are ignored for
+        scheduling but kept in `extra`, so to_dict() returns what was read.
+        """
+        extra = {key: value for key, value in med.items() if key not in _MEDICATION_KEYS}
+        raw_frequency = med.get("frequency", "Daily")
+        frequency = Frequency.parse(raw_frequency) or raw_frequency
+
+        # to_dict() always writes these (times for non-Once); drop them again if they were absent
+        for key in ("name", "frequency", "times"):
+            if key not in med and not (key == "times" and frequency is Frequency.ONCE):
+                extra[key] = _MISSING
+
+        times = []
+        raw_times = med.get("times")
+        if isinstance(raw_times, list):
+            for t in raw_times:
+                try:
+                    times.append(parse_minutes(t))
+                except ValueError:
+                    extra["times"] = raw_times
+        if "times" in med and (not isinstance(raw_times, list) or frequency is Frequency.ONCE):
+            extra["times"] = raw_times
+
+        weekday = None
+        if "day" in med:
+            raw_day = med["day"]
+            weekday = _WEEKDAY_BY_NAME.get(raw_day.strip().lower()) if isinstance(raw_day, str) else None
+            if weekday is None or frequency is not Frequency.WEEKLY or raw_day != DAY_NAMES[weekday]:
+                extra["day"] = raw_day
+
+        once_at = None
+        if "datetime" in med:
+            try:
+                once_at = parse_once(med["datetime"])
+            except ValueError:
+                pass
+            if once_at is None or frequency is not Frequency.ONCE:
+                extra["datetime"] = med["datetime"]
+
+        name = med.get("name", "Unnamed")
+        return cls(name, frequency, times, weekday, once_at, med.get("normalized_name"), extra or None)
+
+    def to_dict(self):
+        frequency = self.frequency
+        entry = {
+            "name": self.name,
+            "normalized_name": self.normalized_name,
+            "frequency": frequency.value if isinstance(frequency, Frequency) else frequency,
+        }
+        if frequency is not Frequency.ONCE:
+            entry["times"] = [format_minutes(m) for m in self.times]
+        if frequency is Frequency.WEEKLY and self.weekday is not None:
+            entry["day"] = DAY_NAMES[self.weekday]
+        if frequency is Frequency.ONCE and self.once_at is not None:
+            entry["datetime"] = format_once(self.once_at)
+        return _apply_extra(entry, self.extra)
+
+    @property
+    def time_strings(self):
+        return [format_minutes(m) for m in self.times]
+
+    @property
+    def day_name(self):
+        return DAY_NAMES[self.weekday] if self.weekday is not None else None
+
+    @property
+    def datetime_str(self):
+        return format_once(self.once_at) if self.once_at is not None else None
+
+    def same_schedule(self, other):
+        """True if both entries are the same medicine on the same schedule"""
+        if self.normalized_name != other.normalized_name or self.frequency is not other.frequency:
+            return False
+        if self.frequency is Frequency.ONCE:
+            return self.once_at == other.once_at
+        if self.frequency is Frequency.WEEKLY and self.weekday != other.weekday:
+            return False
+        return self.times == other.times
+
+    def describe(self):
+        """One-line schedule description used by the UI lists"""
+        if self.frequency is Frequency.WEEKLY:
+            return f"**{self.name}** at {', '.join(self.time_strings)} every {self.day_name or 'N/A'}"
+        if self.frequency is Frequency.ONCE:
+            return f"**{self.name}** at {self.datetime_str or 'N/A'}"
+        return f"**{self.name}** at {', '.join(self.time_strings)}"
+
+
+class Patient:
+    __slots__ = ("key", "display_name", "phone", "medications", "extra")
+
+    def __init__(self, key, display_name, phone="", medications=None, extra=None):
+        self.key = sys.intern(key)
+        self.display_name = display_name
+        self.phone = phone
+        self.medications = medications if medications is not None else []
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, key, patient_data):
+        extra = {k: v for k, v in patient_data.items() if k not in _PATIENT_KEYS}
+        for k in ("display_name", "phone"):
+            if k not in patient_data:
+                extra[k] = _MISSING
+        return cls(
+            key,
+            patient_data.get("display_name", key.title()),
+            patient_data.get("phone", ""),
+            [Medication.from_dict(med) for med in patient_data.get("medications", [])],
+            extra or None,
+        )
+
+    def to_dict(self):
+        entry = {
+            "display_name": self.display_name,
+            "phone": self.phone,
+            "medications": [med.to_dict() for med in self.medications],
+        }
+        extra = self.extra
+        if extra:
+            # Values the UI/API changed since load win over the stored placeholders
+            if extra.get("phone") is _MISSING and self.phone:
+                extra = {k: v for k, v in extra.items() if k != "phone"}
+        return _apply_extra(entry, extra)
+
+
+class Schedule:
+    __slots__ = ("patients", "extra")
+
+    def __init__(self, patients=None, extra=None):
+        # normalized patient key -> Patient
+        self.patients = patients if patients is not None else {}
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, schedule_data):
+        patients = {
+            key: Patient.from_dict(key, patient_data)
+            for key, patient_data in schedule_data.get("patients", {}).items()
+        }
+        extra = {k: v for k, v in schedule_data.items() if k != "patients"}
+        return cls(patients, extra or None)
+
+    def to_dict(self):
+        return _apply_extra({"patients": {key: patient.to_dict() for key, patient in self.patients.items()}},
+                            self.extra)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        """
+        Write to a temp file next to `path`, then atomically replace it, so the other
+        processes sharing the store (UI, API, dispatcher) never read a half-written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".med_schedule.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_dict(), f, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
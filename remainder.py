@@ -1,11 +1,15 @@
 import time
+import argparse
 from twilio.rest import Client
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from collections import defaultdict
 
+from models import Frequency, Schedule, to_absolute_minute
+from due_index import DueIndex
+from schedule_watcher import ScheduleWatcher
+
 # Load credentials from .env file
 #load_dotenv()
 
@@ -58,8 +62,7 @@ def send_voice_reminder(to_number, patient_name, medicine_names, time_str, frequ
 
 def check_and_send_reminders():
     try:
-        with open("med_schedule.json", "r") as f:
-            data = json.load(f)
+        schedule = Schedule.load("med_schedule.json")
     except Exception as e:
         print(f"⚠️ Error reading med_schedule.json: {e}")
         return
@@ -68,6 +71,10 @@ def check_and_send_reminders():
     current_time_str = now.strftime("%H:%M")
     current_date_str = now.strftime("%Y-%m-%d")
     current_weekday = now.strftime("%A").lower()
+    # Parsed once per run; medication times are already integer minutes
+    current_minute = now.hour * 60 + now.minute
+    current_absolute_minute = to_absolute_minute(now)
+    current_weekday_index = now.weekday()
 
     print(f"[INFO] Checking reminders for {current_time_str} on {current_weekday}, {current_date_str}")
 
@@ -78,52 +85,44 @@ def check_and_send_reminders():
     # Track ONCE medications to remove:
     once_alarms_to_remove = defaultdict(list)  # patient_name → list of med indices to remove
 
-    for patient_name, info in data.get("patients", {}).items():
-        phone = info.get("phone")
+    for patient_name, patient in schedule.patients.items():
+        phone = patient.phone
         if not phone:
             print(f"⚠️ Skipping patient {patient_name} — no phone number.")
             continue
 
-        for i, med in enumerate(info.get("medications", [])):
-            med_name = med.get("name", "Unnamed")
-            times = med.get("times", [])
-            frequency = med.get("frequency", "daily").lower()
-
-            if frequency == "once":
-                datetime_str = med.get("datetime")
-                if datetime_str:
-                    try:
-                        scheduled_dt = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
-                        if now.strftime("%Y-%m-%d") == scheduled_dt.strftime("%Y-%m-%d") and \
-                                current_time_str == scheduled_dt.strftime("%H:%M"):
-                            print(f"[MATCH] ONCE for {patient_name}: {med_name} at {scheduled_dt.strftime('%H:%M')}")
-                            reminders_to_send[(patient_name, phone)][scheduled_dt.strftime("%H:%M")].append(med_name)
-
-                            # MARK THIS ONCE alarm for removal:
-                            once_alarms_to_remove[patient_name].append(i)
-
-                        else:
-                            print(f"[SKIP] ONCE for {patient_name}: {med_name} — Not time yet.")
-                    except Exception as e:
-                        print(f"⚠️ Error parsing 'once' datetime for {patient_name}: {e}")
-
-            elif frequency == "daily":
-                if current_time_str in times:
+        for i, med in enumerate(patient.medications):
+            med_name = med.name
+            frequency = med.frequency
+
+            if frequency is Frequency.ONCE:
+                if med.once_at is None:
+                    print(f"⚠️ Error parsing 'once' datetime for {patient_name}: {med_name}")
+                elif med.once_at == current_absolute_minute:
+                    print(f"[MATCH] ONCE for {patient_name}: {med_name} at {current_time_str}")
+                    reminders_to_send[(patient_name, phone)][current_time_str].append(med_name)
+
+                    # MARK THIS ONCE alarm for removal:
+                    once_alarms_to_remove[patient_name].append(i)
+                else:
+                    print(f"[SKIP] ONCE for {patient_name}: {med_name} — Not time yet.")
+
+            elif frequency is Frequency.DAILY:
+                if current_minute in med.times:
                     print(f"[MATCH] DAILY for {patient_name}: {med_name} at {current_time_str}")
                     reminders_to_send[(patient_name, phone)][current_time_str].append(med_name)
                 else:
                     print(f"[SKIP] DAILY for {patient_name}: {med_name} — Not time yet.")
 
-            elif frequency == "weekly":
-                scheduled_day = med.get("day", "").lower()
-                if scheduled_day == current_weekday:
-                    if current_time_str in times:
+            elif frequency is Frequency.WEEKLY:
+                if med.weekday == current_weekday_index:
+                    if current_minute in med.times:
                         print(f"[MATCH] WEEKLY for {patient_name}: {med_name} at {current_time_str} on {current_weekday}")
                         reminders_to_send[(patient_name, phone)][current_time_str].append(med_name)
                     else:
                         print(f"[SKIP] WEEKLY for {patient_name}: {med_name} — Not time yet.")
                 else:
-                    print(f"[SKIP] WEEKLY for {patient_name}: {med_name} — Today is {current_weekday}, not {scheduled_day}.")
+                    print(f"[SKIP] WEEKLY for {patient_name}: {med_name} — Today is {current_weekday}, not {(med.day_name or '').lower()}.")
 
             else:
                 print(f"[WARN] Unknown frequency '{frequency}' for {patient_name}: {med_name}")
@@ -139,22 +138,131 @@ def check_and_send_reminders():
             continue
         print(f"[INFO] Removing triggered ONCE alarms for {patient_name}...")
 
-        meds = data["patients"][patient_name]["medications"]
+        meds = schedule.patients[patient_name].medications
         # Remove in reverse order to avoid index shift
         for i in sorted(indices, reverse=True):
             removed_med = meds.pop(i)
-            print(f"✅ Removed ONCE alarm for {removed_med['name']} from {patient_name}")
+            print(f"✅ Removed ONCE alarm for {removed_med.name} from {patient_name}")
 
     # Save updated file if any ONCE removed
     if once_alarms_to_remove:
         try:
-            with open("med_schedule.json", "w") as f:
-                json.dump(data, f, indent=4)
+            schedule.save("med_schedule.json")
             print("[INFO] Saved updated med_schedule.json after ONCE alarm cleanup.")
         except Exception as e:
             print(f"⚠️ Error saving med_schedule.json: {e}")
 
+def remove_once_alarms(fired):
+    """Drop fired ONCE alarms from med_schedule.json. fired: patient_key -> set of absolute minutes"""
+    try:
+        schedule = Schedule.load("med_schedule.json")
+    except Exception as e:
+        print(f"⚠️ Error reading med_schedule.json: {e}")
+        return
+
+    for patient_name, minutes in fired.items():
+        patient = schedule.patients.get(patient_name)
+        if not patient:
+            continue
+        kept = []
+        for med in patient.medications:
+            if med.frequency is Frequency.ONCE and med.once_at in minutes:
+                print(f"✅ Removed ONCE alarm for {med.name} from {patient_name}")
+            else:
+                kept.append(med)
+        patient.medications = kept
+
+    try:
+        schedule.save("med_schedule.json")
+        print("[INFO] Saved updated med_schedule.json after ONCE alarm cleanup.")
+    except Exception as e:
+        print(f"⚠️ Error saving med_schedule.json: {e}")
+
+def dispatch_minute(index, lock, minute):
+    """Send every reminder the index has for `minute` and clean up fired ONCE alarms"""
+    with lock:
+        due = index.due_at(minute)
+
+    time_str = minute.strftime("%H:%M")
+    absolute_minute = to_absolute_minute(minute)
+    fired_once = {}
+    for patient, meds in due:
+        if not patient.phone:
+            print(f"⚠️ Skipping patient {patient.key} — no phone number.")
+            continue
+        print(f"[MATCH] {patient.key}: {', '.join(med.name for med in meds)} at {time_str}")
+        send_voice_reminder(patient.phone, patient.key, [med.name for med in meds], time_str, "grouped")
+        if any(med.frequency is Frequency.ONCE for med in meds):
+            fired_once.setdefault(patient.key, set()).add(absolute_minute)
+
+    # The watcher picks up this write and reindexes the affected patients
+    if fired_once:
+        remove_once_alarms(fired_once)
+
+# How late a reminder may still be sent when the daemon falls behind; older ones are
+# logged as missed rather than telling a patient to take a dose hours after the fact
+CATCH_UP_GRACE = timedelta(minutes=5)
+
+def log_missed_minutes(index, lock, first, last):
+    """Log (without calling) every reminder due in [first, last]"""
+    minute = first
+    while minute <= last:
+        with lock:
+            due = index.due_at(minute)
+        for patient, meds in due:
+            print(f"[MISSED] {patient.key}: {', '.join(med.name for med in meds)} at "
+                  f"{minute.strftime('%Y-%m-%d %H:%M')} — beyond the catch-up window, not called.")
+        minute += timedelta(minutes=1)
+
+def run_daemon():
+    """
+    Long-running mode: keep a DueIndex of med_schedule.json in memory, updated
+    incrementally by a file watcher, and dispatch every minute in order. If a
+    dispatch runs long or the sleep overshoots, skipped minutes up to
+    CATCH_UP_GRACE old are caught up (late); older ones are logged as missed.
+    """
+    index = DueIndex()
+    watcher = ScheduleWatcher("med_schedule.json", index)
+    watcher.start()
+
+    last_dispatched = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=1)
+    try:
+        while True:
+            minute = last_dispatched + timedelta(minutes=1)
+            now = datetime.now()
+            if now < minute:
+                # Wake just after the next minute boundary
+                time.sleep((minute - now).total_seconds() + 0.05)
+                continue
+
+            oldest_allowed = now.replace(second=0, microsecond=0) - CATCH_UP_GRACE
+            if minute < oldest_allowed:
+                print(f"[WARN] Dispatcher stalled; reminders from {minute.strftime('%Y-%m-%d %H:%M')} to "
+                      f"{(oldest_allowed - timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M')} are skipped.")
+                log_missed_minutes(index, watcher.lock, minute, oldest_allowed - timedelta(minutes=1))
+                last_dispatched = oldest_allowed - timedelta(minutes=1)
+                continue
+
+            behind = int((now - minute).total_seconds() // 60)
+            if behind:
+                print(f"[WARN] Dispatcher is {behind} min behind, catching up on {minute.strftime('%H:%M')}")
+            dispatch_minute(index, watcher.lock, minute)
+            last_dispatched = minute
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
 if __name__ == "__main__":
-    print("[INFO] Reminder system (cron job mode) started...")
-    check_and_send_reminders()
+    parser = argparse.ArgumentParser(description="Medicine reminder dispatcher")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and react to med_schedule.json edits instead of a single cron pass")
+    args = parser.parse_args()
+
+    if args.daemon:
+        print("[INFO] Reminder system (daemon mode) started...")
+        run_daemon()
+    else:
+        print("[INFO] Reminder system (cron job mode) started...")
+        check_and_send_reminders()
     print("[INFO] Reminder system finished. Exiting.")
@@ -0,0 +1,327 @@
+import os
+import json
+import calendar
+import threading
+
+from models import (
+    MINUTES_PER_DAY,
+    Frequency,
+    Medication,
+    Patient,
+    Schedule,
+    parse_minutes,
+    parse_once,
+    format_once,
+    to_absolute_minute,
+)
+
+
+DATA_FILE = "med_schedule.json"
+FREQUENCIES = ["Daily", "Once", "Weekly"]
+
+# Serializes load -> modify -> save cycles coming from concurrent API requests
+_store_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """Normalize names by stripping whitespace and converting to lowercase"""
+    return name.strip().lower()
+
+def normalize_medicine_name(med_name):
+    """Normalize medicine names by stripping whitespace and converting to lowercase"""
+    return med_name.strip().lower()
+
+def remove_empty_patients(schedule):
+    empty_patients = [key for key, patient in schedule.patients.items() if not patient.medications]
+    for key in empty_patients:
+        del schedule.patients[key]
+
+def validate_phone_number(phone_number):
+    """Validate phone number format"""
+    if not phone_number:
+        return False, "Phone number is required for new patients!"
+
+    if not isinstance(phone_number, str):
+        return False, "Phone number must be a string, e.g. \"+91xxxxxxxxxx\"!"
+
+    # Normalize input: add '+' if missing but starts with 91
+    if phone_number.startswith("91") and not phone_number.startswith("+91"):
+        phone_number = "+" + phone_number
+
+    if not phone_number.startswith("+91"):
+        return False, "Phone number must start with +91!"
+
+    # Remove +91
+    remaining_digits = phone_number[3:]
+    # Remove spaces and dashes
+    remaining_digits = remaining_digits.replace(" ", "").replace("-", "")
+
+    if not remaining_digits.isdigit():
+        return False, "Phone number must contain only digits after +91!"
+
+    if len(remaining_digits) != 10:
+        return False, "Phone number must be 10 digits after +91!"
+
+    return True, ""
+
+def validate_medication(frequency, times=None, day=None, datetime_str=None):
+    """Validate a medication schedule coming from outside the UI widgets"""
+    if frequency not in FREQUENCIES:
+        return False, f"Frequency must be one of {', '.join(FREQUENCIES)}!"
+
+    if frequency in ["Daily", "Weekly"]:
+        if not isinstance(times, list) or not times:
+            return False, "At least one dose time is required, as a list of HH:MM strings!"
+        for t in times:
+            try:
+                parse_minutes(t)
+            except ValueError:
+                return False, f"Invalid dose time '{t}', expected HH:MM!"
+
+    if frequency == "Weekly" and day not in calendar.day_name:
+        return False, "Day must be a full weekday name, e.g. Monday!"
+
+    if frequency == "Once":
+        try:
+            parse_once(datetime_str)
+        except ValueError:
+            return False, "Datetime must be in 'YYYY-MM-DD HH:MM' format!"
+
+    return True, ""
+
+def check_medicine_exists(patient_medications, med_name, frequency, times=None, day=None, datetime_str=None):
+    """Check if a medicine with same name and schedule already exists for a patient"""
+    candidate = build_medication(med_name, frequency, times, day, datetime_str)
+    return any(med.same_schedule(candidate) for med in patient_medications)
+
+def format_once_datetime(once_date, once_time):
+    """Build the 'YYYY-MM-DD HH:MM' string stored for Once medications"""
+    return f"{once_date.strftime('%Y-%m-%d')} {once_time.strftime('%H:%M')}"
+
+def build_medication(med_name, frequency, times=None, day=None, datetime_str=None):
+    """Build a Medication from UI/API values ('HH:MM' times, weekday name, 'YYYY-MM-DD HH:MM')"""
+    entry = {"name": med_name, "frequency": frequency}
+
+    if frequency == "Daily":
+        entry["times"] = times
+    elif frequency == "Weekly":
+        entry["times"] = times
+        entry["day"] = day
+    elif frequency == "Once":
+        entry["datetime"] = datetime_str
+
+    return Medication.from_dict(entry)
+
+def migrate_schedule(schedule_data):
+    """Convert old data structures to the current one (normalized keys, display names)"""
+    if "patients" not in schedule_data:
+        return {"patients": {}}
+
+    normalized_patients = {}
+    for patient_name, patient_data in schedule_data["patients"].items():
+        normalized_key = normalize_name(patient_name)
+
+        # If old structure (list), convert to dict
+        if isinstance(patient_data, list):
+            normalized_patients[normalized_key] = {
+                "phone": "",
+                "display_name": patient_name,
+                "medications": []
+            }
+            for med in patient_data:
+                med["normalized_name"] = normalize_medicine_name(med["name"])
+                normalized_patients[normalized_key]["medications"].append(med)
+        else:
+            # Ensure display_name is stored
+            if "display_name" not in patient_data:
+                patient_data["display_name"] = patient_name
+
+            for med in patient_data.get("medications", []):
+                if "normalized_name" not in med:
+                    med["normalized_name"] = normalize_medicine_name(med["name"])
+
+            normalized_patients[normalized_key] = patient_data
+
+    # Replace with normalized keys
+    schedule_data["patients"] = normalized_patients
+    return schedule_data
+
+def load_schedule(path=DATA_FILE):
+    """Load existing data (converting old structures) or initialize an empty schedule"""
+    if not os.path.exists(path):
+        return Schedule()
+    with open(path, "r") as f:
+        return Schedule.from_dict(migrate_schedule(json.load(f)))
+
+def save_schedule(schedule, path=DATA_FILE):
+    schedule.save(path)
+
+def upsert_patient(schedule, patient_name, phone_number=None):
+    """
+    Create a patient, or update the phone number of an existing one.
+    Returns (ok, error_message, patient_key).
+    """
+    normalized_patient_name = normalize_name(patient_name)
+    is_new_patient = normalized_patient_name not in schedule.patients
+
+    # For new patients, phone number is mandatory; for existing ones validate only if provided
+    if is_new_patient or phone_number:
+        phone_valid, error_message = validate_phone_number(phone_number)
+        if not phone_valid:
+            return False, error_message, normalized_patient_name
+
+    if is_new_patient:
+        schedule.patients[normalized_patient_name] = Patient(normalized_patient_name, patient_name, phone_number)
+    elif phone_number:
+        schedule.patients[normalized_patient_name].phone = phone_number
+
+    return True, "", normalized_patient_name
+
+def add_medication(schedule, patient_key, med_name, frequency, times=None, day=None, datetime_str=None):
+    """
+    Append a medication to an existing patient unless the same schedule is already there.
+    Returns True if added, False if it was a duplicate.
+    """
+    medications = schedule.patients[patient_key].medications
+    new_med = build_medication(med_name, frequency, times, day, datetime_str)
+    if any(med.same_schedule(new_med) for med in medications):
+        return False
+    medications.append(new_med)
+    return True
+
+def _apply_medication(schedule, patient_key, item):
+    """Validate and add one medication record for an existing patient, returning its result dict"""
+    if not isinstance(item, dict):
+        return {"patient": patient_key, "status": "error", "error": "Medication must be an object!"}
+    med_name = item.get("name")
+    if not isinstance(med_name, str) or not med_name.strip():
+        return {"patient": patient_key, "status": "error", "error": "Medicine name is required!"}
+    med_name = med_name.strip()
+
+    frequency = item.get("frequency")
+    times = item.get("times") if frequency in ["Daily", "Weekly"] else None
+    day = item.get("day") if frequency == "Weekly" else None
+    datetime_str = item.get("datetime") if frequency == "Once" else None
+
+    valid, error_message = validate_medication(frequency, times, day, datetime_str)
+    if not valid:
+        return {"patient": patient_key, "medicine": med_name, "status": "error", "error": error_message}
+
+    added = add_medication(schedule, patient_key, med_name, frequency, times, day, datetime_str)
+    return {"patient": patient_key, "medicine": med_name, "status": "added" if added else "exists"}
+
+def upsert_patients(schedule, patients):
+    """
+    Apply a batch of patient records: {"name", "phone"?, "medications"?: [...]}.
+    Patients without medications are not kept (same rule as the UI), so a new
+    patient must come with at least one medication.
+    Returns one result dict per input record, in order.
+    """
+    results = []
+    for item in patients:
+        name = item.get("name")
+        if not isinstance(name, str) or not name.strip():
+            results.append({"status": "error", "error": "Patient name is required!"})
+            continue
+        name = name.strip()
+
+        medications = item.get("medications") or []
+        if not isinstance(medications, list):
+            results.append({"patient": normalize_name(name), "status": "error",
+                            "error": "Medications must be a list!"})
+            continue
+        key = normalize_name(name)
+        if key not in schedule.patients and not medications:
+            results.append({"patient": key, "status": "error",
+                            "error": "New patients need at least one medication!"})
+            continue
+
+        ok, error_message, key = upsert_patient(schedule, name, item.get("phone"))
+        if not ok:
+            results.append({"patient": key, "status": "error", "error": error_message})
+            continue
+
+        med_results = [_apply_medication(schedule, key, med) for med in medications]
+        results.append({"patient": key, "status": "ok", "medications": med_results})
+
+    remove_empty_patients(schedule)
+    return results
+
+def upsert_medications(schedule, medications):
+    """
+    Apply a batch of medication records:
+    {"patient", "phone"?, "name", "frequency", "times"?, "day"?, "datetime"?}.
+    Unknown patients are created when a valid phone is supplied.
+    Returns one result dict per input record, in order.
+    """
+    results = []
+    for item in medications:
+        patient_name = item.get("patient")
+        if not isinstance(patient_name, str) or not patient_name.strip():
+            results.append({"status": "error", "error": "Patient name is required!"})
+            continue
+        patient_name = patient_name.strip()
+
+        ok, error_message, key = upsert_patient(schedule, patient_name, item.get("phone"))
+        if not ok:
+            results.append({"patient": key, "status": "error", "error": error_message})
+            continue
+
+        results.append(_apply_medication(schedule, key, item))
+
+    remove_empty_patients(schedule)
+    return results
+
+def due_reminders(schedule, start, end):
+    """
+    List every reminder falling in [start, end] (minute resolution), using the
+    same schedule matching as the cron dispatcher. Sorted by time, then patient.
+    Reminders for patients without a phone number, which the dispatcher skips,
+    are listed with "status": "skipped" instead of "due".
+    """
+    start_minute = to_absolute_minute(start)
+    end_minute = to_absolute_minute(end)
+    first_day = start_minute // MINUTES_PER_DAY
+    last_day = end_minute // MINUTES_PER_DAY
+
+    due = []
+    for patient_key, patient in schedule.patients.items():
+        for med in patient.medications:
+            occurrences = []
+
+            if med.frequency is Frequency.ONCE:
+                if med.once_at is not None:
+                    occurrences.append(med.once_at)
+            elif med.frequency is Frequency.DAILY or med.frequency is Frequency.WEEKLY:
+                for day in range(first_day, last_day + 1):
+                    # Ordinal 1 (0001-01-01) is a Monday
+                    if med.frequency is Frequency.WEEKLY and (day - 1) % 7 != med.weekday:
+                        continue
+                    base = day * MINUTES_PER_DAY
+                    occurrences.extend(base + m for m in med.times)
+
+            for when in occurrences:
+                if start_minute <= when <= end_minute:
+                    due.append((when, patient_key, patient, med))
+
+    due.sort(key=lambda r: (r[0], r[1]))
+    return [
+        {
+            "time": format_once(when),
+            "patient": patient_key,
+            "display_name": patient.display_name,
+            "phone": patient.phone or "",
+            "medicine": med.name,
+            "frequency": med.frequency.value,
+            "status": "due" if patient.phone else "skipped",
+        }
+        for when, patient_key, patient, med in due
+    ]
+
+def apply_batch(path, operation, records):
+    """Load the store, apply a batch operation and save it once, under the store lock"""
+    with _store_lock:
+        schedule = load_schedule(path)
+        results = operation(schedule, records)
+        save_schedule(schedule, path)
+    return results
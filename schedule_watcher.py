@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import threading
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+
+# Events that can mean the store's content changed; opened/closed_no_write events
+# (including the ones our own reads trigger) are ignored
+WRITE_EVENT_TYPES = {"modified", "created", "moved", "closed"}
+
+
+class ScheduleWatcher(FileSystemEventHandler):
+    """
+    Keeps a DueIndex in sync with med_schedule.json using file-change notifications.
+
+    The directory holding the store is watched (so atomic replaces are seen too);
+    on every write event touching the file it is re-read and handed to
+    DueIndex.apply(), which only re-buckets patients whose records changed.
+    A file that fails to parse is skipped, and not re-read until its mtime changes.
+    """
+
+    def __init__(self, path, index, lock=None):
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.index = index
+        # Shared with the dispatch loop so it never reads a half-updated index
+        self.lock = lock or threading.Lock()
+        self.last_reindex_ms = None
+        self._last_mtime = None
+        self._observer = None
+
+    def reindex(self, started=None):
+        """Re-read the store and apply the per-patient diff. Returns True if the index changed."""
+        started = started if started is not None else time.perf_counter()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._last_mtime:
+                return False
+            self._last_mtime = mtime
+            with open(self.path, "r") as f:
+                schedule_data = json.load(f)
+        except FileNotFoundError:
+            schedule_data = {"patients": {}}
+            self._last_mtime = None
+        except (OSError, ValueError) as e:
+            # Caught mid-write or a broken file; retried once the file changes again
+            print(f"⚠️ Error reading {self.path}, keeping the current index: {e}")
+            return False
+
+        with self.lock:
+            added, changed, removed = self.index.apply(schedule_data)
+
+        self.last_reindex_ms = (time.perf_counter() - started) * 1000
+        if added or changed or removed:
+            print(f"[INFO] Reindexed med_schedule.json: {added} added, {changed} changed, {removed} removed "
+                  f"patients in {self.last_reindex_ms:.1f} ms ({len(self.index)} patients indexed)")
+            return True
+        return False
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in WRITE_EVENT_TYPES:
+            return
+        started = time.perf_counter()
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        if any(p and os.path.abspath(p) == self.path for p in paths):
+            self.reindex(started)
+
+    def start(self):
+        self.reindex()
+        self._observer = Observer()
+        self._observer.schedule(self, os.path.dirname(self.path), recursive=False)
+        self._observer.start()
+        print(f"[INFO] Watching {self.path} for changes...")
+
+    def stop(self):
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
@@ -0,0 +1,187 @@
+import json
+import random
+import argparse
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+
+from models import Frequency, Schedule, format_once, to_absolute_minute
+from due_index import DueIndex
+
+
+# Replays med_schedule.json against a virtual clock to see how the cron dispatcher
+# (remainder.check_and_send_reminders) would behave: it only fires reminders whose
+# time equals the minute it happens to run in, so anything between runs is missed.
+# No sleeping, no Twilio — every minute of the window is a DueIndex lookup.
+#
+#   python simulate.py --days 7 --cadence 5 --jitter 3 --cost-per-call 0.02
+
+
+def run_minutes(start, end, cadence, jitter, rng):
+    """
+    Dispatcher runs per absolute minute: cron `*/cadence` ticks (minutes of the hour
+    divisible by `cadence`), each delayed by a random 0..jitter minutes. With
+    jitter >= cadence two ticks can land in the same minute; that minute then
+    counts 2 runs, and each run places its calls again.
+    """
+    if not 1 <= cadence <= 59:
+        raise ValueError("cadence must be between 1 and 59 minutes (cron */N minute step)")
+    runs = Counter()
+    for tick in range(start - jitter, end + 1):
+        if tick % 60 % cadence:
+            continue
+        minute = tick + (rng.randint(0, jitter) if jitter else 0)
+        if start <= minute <= end:
+            runs[minute] += 1
+    return runs
+
+def simulate(schedule_data, start, end, cadence=5, jitter=0, seed=None):
+    """
+    Walk every minute in [start, end] and split scheduled reminders into those the
+    dispatcher would send (a run falls on that minute) and those it would miss.
+    Returns a dict of raw results; see print_report() for the summary.
+    """
+    index = DueIndex()
+    index.apply(schedule_data)
+
+    start_minute = to_absolute_minute(start)
+    end_minute = to_absolute_minute(end)
+    run_counts = run_minutes(start_minute, end_minute, cadence, jitter, random.Random(seed))
+    runs = sorted(run_counts)
+
+    calls_per_minute = Counter()  # absolute minute -> voice calls placed
+    sent = []                     # (minute, patient_key, med_name)
+    missed = []                   # (minute, patient_key, med_name, delay to next run or None)
+    missed_once = []              # subset of missed that are ONCE alarms
+    no_phone = []                 # (minute, patient_key, med_name)
+
+    minute_dt = start.replace(second=0, microsecond=0)
+    for minute in range(start_minute, end_minute + 1):
+        due = index.due_at(minute_dt)
+        minute_dt += timedelta(minutes=1)
+        if not due:
+            continue
+
+        for patient, meds in due:
+            if not patient.phone:
+                no_phone.extend((minute, patient.key, med.name) for med in meds)
+            elif minute in run_counts:
+                # All of a patient's medicines for one time are grouped into one call, per run
+                calls_per_minute[minute] += run_counts[minute]
+                sent.extend((minute, patient.key, med.name) for med in meds)
+            else:
+                i = bisect_left(runs, minute)
+                delay = runs[i] - minute if i < len(runs) else None
+                for med in meds:
+                    missed.append((minute, patient.key, med.name, delay))
+                    if med.frequency is Frequency.ONCE:
+                        missed_once.append(missed[-1])
+
+    # ONCE alarms already in the past never fire and are never cleaned up
+    stale_once = []
+    for patient in Schedule.from_dict(schedule_data).patients.values():
+        for med in patient.medications:
+            if med.frequency is Frequency.ONCE and med.once_at is not None and med.once_at < start_minute:
+                stale_once.append((med.once_at, patient.key, med.name))
+
+    return {
+        "start": start_minute,
+        "end": end_minute,
+        "runs": runs,
+        "run_counts": run_counts,
+        "calls_per_minute": calls_per_minute,
+        "sent": sent,
+        "missed": missed,
+        "missed_once": missed_once,
+        "stale_once": stale_once,
+        "no_phone": no_phone,
+    }
+
+def load_histogram(runs, calls_per_minute):
+    """Number of minutes with a dispatcher run per call-load bucket (0, 1, 2-3, 4-7, 8-15, ...)"""
+    buckets = Counter()
+    for minute in runs:
+        calls = calls_per_minute.get(minute, 0)
+        low = 1 << (calls.bit_length() - 1) if calls else 0
+        buckets[low] += 1
+    return sorted(buckets.items())
+
+def print_report(result, cost_per_call=0.0, top=5):
+    runs, run_counts = result["runs"], result["run_counts"]
+    calls_per_minute = result["calls_per_minute"]
+    total_calls = sum(calls_per_minute.values())
+    sent, missed = result["sent"], result["missed"]
+    scheduled = len(sent) + len(missed)
+    overlapping = sum(count - 1 for count in run_counts.values())
+
+    print(f"[INFO] Simulated {format_once(result['start'])} → {format_once(result['end'])}: "
+          f"{sum(run_counts.values())} dispatcher runs in {len(runs)} distinct minutes")
+    if overlapping:
+        print(f"⚠️ {overlapping} runs landed in a minute another run already used; their calls are placed twice")
+    print(f"📞 Calls placed: {total_calls} ({len(sent)} reminders), dispatch cost: {total_calls * cost_per_call:.2f}")
+    if calls_per_minute:
+        peak_minute, peak_calls = max(calls_per_minute.items(), key=lambda kv: (kv[1], -kv[0]))
+        print(f"📈 Peak load: {peak_calls} calls/min at {format_once(peak_minute)}")
+
+    if runs:
+        print("\nCall load per dispatcher run-minute (calls/min → minutes with that load):")
+        histogram = load_histogram(runs, calls_per_minute)
+        widest = max(count for _, count in histogram)
+        for low, count in histogram:
+            label = f"{low}" if low <= 1 else f"{low}-{2 * low - 1}"
+            bar = "█" * max(1, round(30 * count / widest))
+            print(f"  {label:>11} | {bar} {count}")
+
+    if calls_per_minute:
+        print("\nBusiest minutes:")
+        for minute, calls in sorted(calls_per_minute.items(), key=lambda kv: (-kv[1], kv[0]))[:top]:
+            print(f"  {format_once(minute)}  {calls} calls")
+
+    if scheduled:
+        print(f"\n❌ Missed reminders: {len(missed)} of {scheduled} ({100 * len(missed) / scheduled:.1f}%) — "
+              f"no run in that exact minute")
+    delays = [m[3] for m in missed if m[3] is not None]
+    if delays:
+        print(f"⏱️  If caught up at the next run they would be late by "
+              f"avg {sum(delays) / len(delays):.1f} min, max {max(delays)} min")
+    for minute, patient_key, med_name, _ in missed[:top]:
+        print(f"  {format_once(minute)}  {patient_key}: {med_name}")
+
+    if result["missed_once"]:
+        print(f"\n⚠️ ONCE alarms that would never fire in this window: {len(result['missed_once'])}")
+        for minute, patient_key, med_name, _ in result["missed_once"][:top]:
+            print(f"  {format_once(minute)}  {patient_key}: {med_name}")
+    if result["stale_once"]:
+        print(f"⚠️ ONCE alarms already in the past (never fire, never removed): {len(result['stale_once'])}")
+        for minute, patient_key, med_name in sorted(result["stale_once"])[:top]:
+            print(f"  {format_once(minute)}  {patient_key}: {med_name}")
+    if result["no_phone"]:
+        print(f"⚠️ Reminders skipped for patients without a phone number: {len(result['no_phone'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the reminder schedule against a virtual clock")
+    parser.add_argument("--data-file", default="med_schedule.json")
+    parser.add_argument("--start", help="'YYYY-MM-DD HH:MM' (default: now)")
+    parser.add_argument("--days", type=float, default=1, help="length of the simulated window")
+    parser.add_argument("--cadence", type=int, default=5, help="minutes between dispatcher runs (cron */N, 1-59)")
+    parser.add_argument("--jitter", type=int, default=0, help="max random delay of each run, in minutes")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible jitter")
+    parser.add_argument("--cost-per-call", type=float, default=0.0, help="price of one outbound voice call")
+    parser.add_argument("--top", type=int, default=5, help="how many entries to list per section")
+    args = parser.parse_args()
+
+    if not 1 <= args.cadence <= 59 or args.jitter < 0:
+        parser.error("--cadence must be between 1 and 59 (cron */N minute step) and --jitter >= 0")
+    if args.jitter >= args.cadence:
+        print(f"⚠️ --jitter {args.jitter} >= --cadence {args.cadence}: runs can overlap and place duplicate calls")
+
+    start = datetime.strptime(args.start, "%Y-%m-%d %H:%M") if args.start else datetime.now()
+    start = start.replace(second=0, microsecond=0)
+    end = start + timedelta(days=args.days) - timedelta(minutes=1)
+
+    with open(args.data_file, "r") as f:
+        schedule_data = json.load(f)
+
+    result = simulate(schedule_data, start, end, args.cadence, args.jitter, args.seed)
+    print_report(result, args.cost_per_call, args.top)
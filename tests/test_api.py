@@ -0,0 +1,68 @@
+import json
+import shutil
+import threading
+import http.client
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def server(tmp_path):
+    data_file = tmp_path / "med_schedule.json"
+    shutil.copy("med_schedule.json", data_file)
+    api.ScheduleAPIHandler.data_file = str(data_file)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.ScheduleAPIHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _request(address, method, path, body=b"", headers=None):
+    conn = http.client.HTTPConnection(*address, timeout=5)
+    conn.putrequest(method, path)
+    for name, value in (headers or {"Content-Length": str(len(body))}).items():
+        conn.putheader(name, value)
+    conn.endheaders()
+    if body:
+        conn.send(body)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+@pytest.mark.parametrize("headers", [{"Content-Length": "abc"}, {"Content-Length": str(api.MAX_BODY_BYTES + 1)}])
+def test_bad_content_length_is_rejected(server, headers):
+    status, payload = _request(server, "POST", "/medications/batch", b'{"medications": []}', headers)
+    assert status == 400
+    assert "medications" in payload["error"]
+
+
+def test_batch_field_must_be_a_list_of_objects(server):
+    assert _request(server, "POST", "/patients/batch", b'{"patients": 5}')[0] == 400
+    assert _request(server, "POST", "/patients/batch", b'{"patients": [5]}')[0] == 400
+
+
+def test_batch_returns_per_record_results(server):
+    body = json.dumps({"medications": [
+        {"patient": "Ann", "phone": "+919876543210", "name": "A", "frequency": "Daily", "times": ["08:00"]},
+        {"patient": "Ann", "name": 5},
+    ]}).encode()
+    status, payload = _request(server, "POST", "/medications/batch", body)
+    assert status == 200
+    assert [r["status"] for r in payload["results"]] == ["added", "error"]
+
+
+def test_due_window_is_capped(server):
+    status, payload = _request(server, "GET", "/reminders/due?start=2025-06-09%2000:00&end=2025-06-20%2000:00")
+    assert status == 400
+    assert "7 days" in payload["error"]
+
+    status, payload = _request(server, "GET", "/reminders/due?start=2025-06-09%2000:00&end=2025-06-09%2023:59")
+    assert status == 200
+    assert payload["reminders"]
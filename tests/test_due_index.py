@@ -0,0 +1,90 @@
+import json
+from datetime import datetime
+
+from due_index import DueIndex
+
+
+def _data():
+    return {
+        "patients": {
+            "ann": {
+                "display_name": "Ann",
+                "phone": "+919876543210",
+                "medications": [
+                    {"name": "A", "frequency": "Daily", "times": ["08:00", "20:00"]},
+                    {"name": "B", "frequency": "Weekly", "times": ["08:00"], "day": "Monday"},
+                    {"name": "C", "frequency": "Once", "datetime": "2025-06-10 09:15"},
+                ],
+            },
+            "bob": {
+                "display_name": "Bob",
+                "phone": "+919876543211",
+                "medications": [{"name": "D", "frequency": "Daily", "times": ["08:00"]}],
+            },
+        }
+    }
+
+
+def _due(index, when):
+    return {patient.key: sorted(med.name for med in meds) for patient, meds in index.due_at(when)}
+
+
+def test_due_at_matches_daily_weekly_and_once():
+    index = DueIndex()
+    assert index.apply(_data()) == (2, 0, 0)
+
+    monday, tuesday = datetime(2025, 6, 9, 8, 0), datetime(2025, 6, 10, 8, 0)
+    assert _due(index, monday) == {"ann": ["A", "B"], "bob": ["D"]}
+    assert _due(index, tuesday) == {"ann": ["A"], "bob": ["D"]}
+    assert _due(index, datetime(2025, 6, 10, 9, 15)) == {"ann": ["C"]}
+    assert _due(index, datetime(2025, 6, 11, 9, 15)) == {}
+    assert _due(index, datetime(2025, 6, 9, 8, 1)) == {}
+
+
+def test_apply_only_touches_changed_patients():
+    index = DueIndex()
+    index.apply(_data())
+
+    # Fresh dicts, as after re-reading the file
+    assert index.apply(json.loads(json.dumps(_data()))) == (0, 0, 0)
+
+    data = _data()
+    data["patients"]["bob"]["medications"][0]["times"] = ["09:00"]
+    del data["patients"]["ann"]
+    data["patients"]["cy"] = {"display_name": "Cy", "phone": "+919876543212",
+                              "medications": [{"name": "E", "frequency": "Daily", "times": ["09:00"]}]}
+    assert index.apply(data) == (1, 1, 1)
+
+    assert len(index) == 2
+    assert _due(index, datetime(2025, 6, 9, 8, 0)) == {}
+    assert _due(index, datetime(2025, 6, 9, 9, 0)) == {"bob": ["D"], "cy": ["E"]}
+    assert _due(index, datetime(2025, 6, 10, 9, 15)) == {}
+
+
+def test_duplicate_times_are_indexed_once():
+    index = DueIndex()
+    index.apply({"patients": {"ann": {"display_name": "Ann", "phone": "+919876543210", "medications": [
+        {"name": "A", "frequency": "Daily", "times": ["08:00", "08:00"]}]}}})
+    assert _due(index, datetime(2025, 6, 9, 8, 0)) == {"ann": ["A"]}
+
+
+def test_malformed_patient_records_are_skipped():
+    index = DueIndex()
+    index.apply(_data())
+
+    data = _data()
+    data["patients"]["ann"]["medications"] = None
+    data["patients"]["bob"]["medications"][0]["name"] = None
+    data["patients"]["legacy"] = [{"name": "L", "frequency": "Daily", "times": ["08:00"]}]
+    data["patients"]["broken"] = "not a patient"
+    assert index.apply(data) == (1, 0, 0)
+
+    # Bad records keep what was indexed before; the legacy list-shaped patient is indexed
+    assert _due(index, datetime(2025, 6, 9, 8, 0)) == {"ann": ["A", "B"], "bob": ["D"], "legacy": ["L"]}
+
+    data["patients"]["ann"]["medications"] = [{"name": "Z", "frequency": "Daily", "times": ["08:00"]}]
+    assert index.apply(data) == (0, 1, 0)
+    assert _due(index, datetime(2025, 6, 9, 8, 0))["ann"] == ["Z"]
+
+    assert index.apply({"patients": None}) == (0, 0, 0)
+    assert len(index) == 3
@@ -0,0 +1,122 @@
+import os
+import json
+
+import pytest
+
+from models import (
+    Frequency,
+    Medication,
+    Schedule,
+    parse_minutes,
+    format_minutes,
+    parse_once,
+    format_once,
+)
+
+
+SCHEDULE = {
+    "patients": {
+        "kj nair": {
+            "display_name": "KJ Nair",
+            "phone": "+918547341484",
+            "medications": [
+                {"name": "Jalra", "normalized_name": "jalra", "frequency": "Weekly",
+                 "times": ["18:00"], "day": "Monday"},
+                {"name": "PPG", "normalized_name": "ppg", "frequency": "Daily",
+                 "times": ["08:00", "20:30"]},
+                {"name": "PPG", "normalized_name": "ppg", "frequency": "Once",
+                 "datetime": "2025-06-08 19:30"},
+            ],
+        }
+    }
+}
+
+
+def test_time_helpers_round_trip():
+    assert parse_minutes("00:00") == 0
+    assert parse_minutes("23:59") == 23 * 60 + 59
+    assert format_minutes(parse_minutes("08:05")) == "08:05"
+    assert format_once(parse_once("2025-06-08 19:30")) == "2025-06-08 19:30"
+
+
+@pytest.mark.parametrize("value", ["9:00", " 9:00", "+8:00", "08:-1", "0８:00", "24:00", "08:60", "0800", None, 480])
+def test_parse_minutes_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        parse_minutes(value)
+
+
+@pytest.mark.parametrize("value", ["2026-W43-1 10:00", "2026-10-19T10:00", "2026-10-19  9:00",
+                                   "2026-02-30 10:00", "+026-10-19 10:00", "2026-10-19 +9:00", None])
+def test_parse_once_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        parse_once(value)
+
+
+def test_schedule_parses_into_typed_fields():
+    schedule = Schedule.from_dict(SCHEDULE)
+    weekly, daily, once = schedule.patients["kj nair"].medications
+
+    assert weekly.frequency is Frequency.WEEKLY
+    assert weekly.weekday == 0
+    assert daily.times == (8 * 60, 20 * 60 + 30)
+    assert once.once_at == parse_once("2025-06-08 19:30")
+    assert weekly.extra is None and daily.extra is None and once.extra is None
+
+
+def test_clean_schedule_round_trips():
+    assert Schedule.from_dict(SCHEDULE).to_dict() == SCHEDULE
+
+
+def test_unparsed_values_and_extra_keys_are_written_back():
+    data = {
+        "version": 2,
+        "patients": {
+            "ann": {
+                "display_name": "Ann",
+                "notes": "prefers evening calls",
+                "medications": [
+                    {"name": "A", "frequency": "Daily", "times": ["9:00", "10:00"], "notes": "after food"},
+                    {"name": "B", "frequency": "Weekly", "times": ["08:00"], "day": "Someday"},
+                    {"name": "C", "frequency": "Once", "datetime": "2025-6-8 7:00"},
+                    {"name": "D", "frequency": "fortnightly", "times": ["08:00"]},
+                    {"name": "E", "times": ["08:00"], "day": "monday"},
+                    {"name": "F", "frequency": "Daily"},
+                ],
+            }
+        },
+    }
+    expected = json.loads(json.dumps(data))
+    schedule = Schedule.from_dict(data)
+
+    a, b, c, d, e, f = schedule.patients["ann"].medications
+    assert a.times == (10 * 60,)
+    assert b.weekday is None
+    assert c.once_at is None
+    assert d.frequency == "fortnightly"
+    assert e.frequency is Frequency.DAILY
+
+    written = schedule.to_dict()
+    for med in written["patients"]["ann"]["medications"]:
+        med.pop("normalized_name")
+    assert written == expected
+
+
+def test_new_values_override_missing_placeholders():
+    schedule = Schedule.from_dict({"patients": {"ann": {"display_name": "Ann", "medications": []}}})
+    schedule.patients["ann"].phone = "+919876543210"
+    schedule.patients["ann"].medications.append(Medication("A", Frequency.DAILY, [480]))
+
+    patient = schedule.to_dict()["patients"]["ann"]
+    assert patient["phone"] == "+919876543210"
+    assert patient["medications"][0]["times"] == ["08:00"]
+
+
+def test_save_replaces_file_atomically(tmp_path):
+    path = tmp_path / "med_schedule.json"
+    path.write_text("{ broken")
+
+    Schedule.from_dict(SCHEDULE).save(str(path))
+
+    assert json.loads(path.read_text()) == SCHEDULE
+    assert os.listdir(tmp_path) == ["med_schedule.json"]
+    assert Schedule.load(str(path)).to_dict() == SCHEDULE
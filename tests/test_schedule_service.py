@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import schedule_service
+from models import Schedule
+
+
+def _schedule():
+    return Schedule.from_dict({"patients": {
+        "ann": {"display_name": "Ann", "phone": "+919876543210", "medications": [
+            {"name": "A", "frequency": "Daily", "times": ["23:30", "00:30"]},
+            {"name": "B", "frequency": "Weekly", "times": ["08:00"], "day": "Wednesday"},
+            {"name": "C", "frequency": "Once", "datetime": "2025-06-10 00:15"},
+        ]},
+        "bob": {"display_name": "Bob", "phone": "", "medications": [
+            {"name": "D", "frequency": "Daily", "times": ["00:00"]},
+        ]},
+    }})
+
+
+def test_upsert_medications_reports_each_record():
+    schedule = _schedule()
+    results = schedule_service.upsert_medications(schedule, [
+        {"patient": "Cy", "phone": "+919876543211", "name": "E", "frequency": "Daily", "times": ["08:00"]},
+        {"patient": "Ann", "name": "a", "frequency": "Daily", "times": ["23:30", "00:30"]},
+        {"patient": "Dee", "phone": "12345", "name": "F", "frequency": "Daily", "times": ["08:00"]},
+        {"patient": "Dee", "phone": 918547341484, "name": "F", "frequency": "Daily", "times": ["08:00"]},
+        {"patient": 5, "name": "F"},
+        {"patient": "Ann", "name": None},
+        {"patient": "Ann", "name": "G", "frequency": "Daily", "times": "08:00"},
+        {"patient": "Ann", "name": "G", "frequency": "Daily", "times": [" 9:00"]},
+        {"patient": "Ann", "name": "G", "frequency": "Weekly", "times": ["08:00"], "day": "Someday"},
+    ])
+
+    assert [r["status"] for r in results] == ["added", "exists"] + ["error"] * 7
+    assert results[2]["error"] == "Phone number must start with +91!"
+    assert "string" in results[3]["error"]
+    assert [m.name for m in schedule.patients["cy"].medications] == ["E"]
+    # Failed new patients are not left behind without medications
+    assert "dee" not in schedule.patients
+
+
+def test_upsert_patients_reports_each_record():
+    schedule = _schedule()
+    results = schedule_service.upsert_patients(schedule, [
+        {"name": "Ann", "phone": "+919999999999"},
+        {"name": "New"},
+        {"name": "Bob", "medications": 5},
+        {"name": ["Bob"]},
+        {"name": "Cy", "phone": "+919876543211",
+         "medications": [{"name": "E", "frequency": "Once", "datetime": "2025-06-10 10:00"}, 7]},
+    ])
+
+    assert [r["status"] for r in results] == ["ok", "error", "error", "error", "ok"]
+    assert results[1]["error"] == "New patients need at least one medication!"
+    assert [m["status"] for m in results[4]["medications"]] == ["added", "error"]
+    assert schedule.patients["ann"].phone == "+919999999999"
+    assert "new" not in schedule.patients
+
+
+def test_due_reminders_crosses_midnight_and_maps_weekdays():
+    # 2025-06-10 is a Tuesday, 2025-06-11 a Wednesday
+    due = schedule_service.due_reminders(_schedule(), datetime(2025, 6, 10, 23, 0), datetime(2025, 6, 11, 8, 0))
+
+    assert [(r["time"], r["medicine"]) for r in due] == [
+        ("2025-06-10 23:30", "A"),
+        ("2025-06-11 00:00", "D"),
+        ("2025-06-11 00:30", "A"),
+        ("2025-06-11 08:00", "B"),
+    ]
+    assert [r["status"] for r in due] == ["due", "skipped", "due", "due"]
+
+    due = schedule_service.due_reminders(_schedule(), datetime(2025, 6, 10, 0, 15), datetime(2025, 6, 10, 8, 0))
+    assert [(r["time"], r["medicine"]) for r in due] == [("2025-06-10 00:15", "C"), ("2025-06-10 00:30", "A")]
@@ -0,0 +1,64 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from models import to_absolute_minute
+from simulate import run_minutes, load_histogram, simulate
+
+
+START = to_absolute_minute(datetime(2025, 6, 9, 0, 0))
+
+
+def test_run_minutes_follow_cron_minute_step():
+    runs = run_minutes(START, START + 119, 5, 0, random.Random(0))
+    assert [m - START for m in sorted(runs)] == list(range(0, 120, 5))
+    assert set(runs.values()) == {1}
+
+    # */7 restarts at minute 0 of every hour, like cron
+    runs = run_minutes(START, START + 119, 7, 0, random.Random(0))
+    assert [(m - START) % 60 for m in sorted(runs)] == list(range(0, 60, 7)) * 2
+
+
+def test_run_minutes_jitter_is_bounded_and_reproducible():
+    runs = run_minutes(START, START + 599, 5, 3, random.Random(42))
+    assert runs == run_minutes(START, START + 599, 5, 3, random.Random(42))
+    assert all(0 <= (m - START) % 5 <= 3 for m in runs)
+    assert all(START <= m <= START + 599 for m in runs)
+    assert any((m - START) % 5 for m in runs)
+
+
+def test_overlapping_runs_are_counted_and_place_calls_twice():
+    runs = run_minutes(START, START + 24 * 60 - 1, 5, 10, random.Random(1))
+    ticks = 24 * 60 // 5
+    # Every tick whose delayed minute stays inside the window is counted
+    assert sum(runs.values()) >= ticks - 2
+    assert max(runs.values()) >= 2
+
+    data = {"patients": {"ann": {"display_name": "Ann", "phone": "+919876543210", "medications": [
+        {"name": "A", "frequency": "Daily", "times": [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)]},
+    ]}}}
+    result = simulate(data, datetime(2025, 6, 9, 0, 0), datetime(2025, 6, 9, 23, 59), cadence=5, jitter=10, seed=1)
+    assert sum(result["calls_per_minute"].values()) == sum(result["run_counts"].values())
+
+
+@pytest.mark.parametrize("cadence", [0, 60, 120])
+def test_run_minutes_rejects_cadence_outside_cron_range(cadence):
+    with pytest.raises(ValueError):
+        run_minutes(START, START + 60, cadence, 0, random.Random(0))
+
+
+def test_simulate_reports_missed_and_zero_load_runs():
+    data = {"patients": {"ann": {"display_name": "Ann", "phone": "+919876543210", "medications": [
+        {"name": "A", "frequency": "Daily", "times": ["08:00", "12:36"]},
+        {"name": "B", "frequency": "Once", "datetime": "2025-06-09 09:02"},
+    ]}}}
+    result = simulate(data, datetime(2025, 6, 9, 0, 0), datetime(2025, 6, 9, 23, 59), cadence=5)
+
+    assert [(m - START, name) for m, _, name in result["sent"]] == [(8 * 60, "A")]
+    assert [(m - START, name, delay) for m, _, name, delay in result["missed"]] == [
+        (9 * 60 + 2, "B", 3), (12 * 60 + 36, "A", 4)]
+    assert [name for _, _, name, _ in result["missed_once"]] == ["B"]
+
+    histogram = dict(load_histogram(result["runs"], result["calls_per_minute"]))
+    assert histogram == {0: 24 * 12 - 1, 1: 1}